@@ -1,8 +1,6 @@
 import torch
 from torch import nn, Tensor
 import torch.nn.functional as F
-from torchaudio.functional import lfilter
-from torch_fftconv.functional import fft_conv1d
 from typing import Optional, Union, List, Tuple, Callable, Any
 from diffsptk import MLSA
 
@@ -11,13 +9,17 @@ from .lpc import lpc_synthesis
 from .utils import (
     get_radiation_time_filter,
     get_window_fn,
-    coeff_product,
     complex2biquads,
     params2biquads,
+    allpass_filter,
     TimeContext,
-    hilbert,
-    linear_upsample,
-    fir_filt,
+    interp_fir_filt,
+    overlap_add,
+    OverlapAddStateMixin,
+    framewise_conv1d,
+    framewise_fft_conv1d,
+    cached_tensor,
+    compiled,
 )
 
 
@@ -43,8 +45,15 @@ class LTVFilterInterface(FilterInterface):
     def forward(self, ex: Tensor, *args, ctx: TimeContext, **kwargs):
         raise NotImplementedError
 
+    def support(self, *args) -> Optional[int]:
+        """
+        Number of input samples around an output sample that the filter reads,
+        given the same parameters as forward, or None if it is not bounded.
+        """
+        return None
 
-class LTVMinimumPhaseFilter(LTVFilterInterface):
+
+class LTVMinimumPhaseFilter(OverlapAddStateMixin, LTVFilterInterface):
     def __init__(
         self,
         window: str,
@@ -52,7 +61,10 @@ class LTVMinimumPhaseFilter(LTVFilterInterface):
     ):
         super().__init__()
         window = get_window_fn(window)(window_length)
-        self.register_buffer("_kernel", torch.diag(window).unsqueeze(1))
+        self.register_buffer("_window", window, persistent=False)
+
+    def support(self, *args) -> int:
+        return self._window.shape[0]
 
     def forward(self, ex: Tensor, gain: Tensor, a: Tensor, ctx: TimeContext):
         """
@@ -70,7 +82,7 @@ class LTVMinimumPhaseFilter(LTVFilterInterface):
 
         hop_length = ctx.hop_length
 
-        window_size = self._kernel.shape[0]
+        window_size = self._window.shape[0]
         assert window_size >= hop_length * 2, f"{window_size} < {hop_length * 2}"
         padding = (window_size - hop_length) // 2
 
@@ -102,19 +114,8 @@ class LTVMinimumPhaseFilter(LTVFilterInterface):
             batch, frames, -1
         )
 
-        # overlap-add
-        filtered = filtered.transpose(1, 2)
-        ones = filtered.new_ones(1, filtered.shape[1], filtered.shape[2])
-        tmp = torch.cat([filtered, ones], dim=0)
-        tmp = F.conv_transpose1d(
-            tmp, self._kernel, stride=hop_length, padding=padding
-        ).squeeze(1)
-
-        y = tmp[:-1]
-        norm = tmp[-1]
-
-        # normalize
-        return y / norm
+        # overlap-add and normalize
+        return overlap_add(filtered, self._window, hop_length, padding)
 
 
 class LTVMinimumPhaseFIRFilterPrecise(LTVFilterInterface):
@@ -123,18 +124,30 @@ class LTVMinimumPhaseFIRFilterPrecise(LTVFilterInterface):
         self.window_fn = get_window_fn(window)
 
     @staticmethod
-    def get_minimum_phase_fir(log_mag: Tensor):
-        # first, get symmetric log-magnitude
+    def get_minimum_phase_response(log_mag: Tensor):
         # always assume n_fft is even
-        log_mag = torch.cat([log_mag, log_mag.flip(-1)[..., 1:-1]], dim=-1)
-        # get minimum-phase impulse response
-        min_phase = -hilbert(log_mag, dim=-1).imag
-        # get minimum-phase FIR filter
-        frequency_response = torch.exp(log_mag + 1j * min_phase)
+        n_fft = (log_mag.shape[-1] - 1) * 2
+        # real cepstrum of the symmetric log-magnitude
+        cepstrum = torch.fft.irfft(log_mag, n=n_fft)
+        # fold the anti-causal part onto the causal part
+        fold = cepstrum.new_zeros(n_fft)
+        fold[0] = fold[n_fft // 2] = 1
+        fold[1 : n_fft // 2] = 2
+        min_phase = torch.fft.rfft(cepstrum * fold).imag
+        # get minimum-phase frequency response, one-sided
+        return torch.polar(torch.exp(log_mag), min_phase)
+
+    @staticmethod
+    def get_minimum_phase_fir(log_mag: Tensor):
+        H = LTVMinimumPhaseFIRFilterPrecise.get_minimum_phase_response(log_mag)
         # get time-domain filter
-        kernel = torch.fft.ifft(frequency_response, dim=-1).real
+        kernel = torch.fft.irfft(H, n=(log_mag.shape[-1] - 1) * 2, dim=-1)
         return kernel
 
+    def support(self, log_mag: Tensor, *args) -> int:
+        # kernel length, n_fft
+        return (log_mag.shape[-1] - 1) * 2
+
     def windowing(self, kernel: Tensor):
         window = self.window_fn(
             kernel.shape[-1], device=kernel.device, dtype=kernel.dtype
@@ -155,28 +168,18 @@ class LTVMinimumPhaseFIRFilterPrecise(LTVFilterInterface):
         kernel = self.get_minimum_phase_fir(log_mag)
         kernel = self.windowing(kernel)
 
-        # upsampled_kernel = linear_upsample(
-        #     kernel.transpose(1, 2).contiguous(), ctx
-        # ).transpose(1, 2)
-        upsampled_kernel = F.upsample(
-            kernel.transpose(1, 2),
-            scale_factor=ctx.hop_length,
-            mode="linear",
-            align_corners=False,
-        ).transpose(1, 2)
-
-        ex = ex[:, : upsampled_kernel.shape[1]]
-        upsampled_kernel = upsampled_kernel[:, : ex.shape[1]]
-        return fir_filt(ex, upsampled_kernel)
+        return interp_fir_filt(
+            ex, kernel, ctx.hop_length, padding=kernel.shape[-1] - 1, flip=True
+        )
 
 
 class LTVMinimumPhaseFIRFilter(LTVMinimumPhaseFIRFilterPrecise):
-    def __init__(self, window: str, conv_method: str = "direct"):
+    def __init__(self, window: str, conv_method: str = "fft"):
         super().__init__(window=window)
         if conv_method == "direct":
-            self.convolve_fn = F.conv1d
+            self.convolve_fn = framewise_conv1d
         elif conv_method == "fft":
-            self.convolve_fn = fft_conv1d
+            self.convolve_fn = framewise_fft_conv1d
         else:
             raise ValueError(f"Unknown conv_method: {conv_method}")
 
@@ -204,12 +207,8 @@ class LTVMinimumPhaseFIRFilter(LTVMinimumPhaseFIRFilterPrecise):
         ), f"{unfolded.shape} != {kernel.shape}"
         kernel = kernel[:, : unfolded.shape[1]]
 
-        convolved = self.convolve_fn(
-            unfolded.reshape(1, -1, unfolded.shape[-1]),
-            kernel.reshape(-1, 1, kernel.shape[-1]).flip(-1),
-            groups=kernel.shape[0] * kernel.shape[1],
-        ).view(kernel.shape[0], -1)
-        return convolved
+        convolved = self.convolve_fn(unfolded, kernel, flip=True)
+        return convolved.reshape(kernel.shape[0], -1)
 
 
 class LTVZeroPhaseFIRFilterPrecise(LTVFilterInterface):
@@ -219,11 +218,16 @@ class LTVZeroPhaseFIRFilterPrecise(LTVFilterInterface):
 
     @staticmethod
     def get_zero_phase_fir(log_mag: Tensor):
-        mag = torch.exp(log_mag) + 0j
-        # get zero-phase impulse response
-        fir = torch.fft.irfft(mag, dim=-1)
-        fir = torch.fft.fftshift(fir, dim=-1)
-        return fir
+        mag = torch.exp(log_mag)
+        # a circular shift by n_fft / 2 is a (-1)^k modulation of the spectrum,
+        # so the centered zero-phase response stays a real-input irfft
+        sign = mag.new_ones(mag.shape[-1])
+        sign[1::2] = -1
+        return torch.fft.irfft(mag * sign, dim=-1)
+
+    def support(self, log_mag: Tensor, *args) -> int:
+        # kernel length, n_fft
+        return (log_mag.shape[-1] - 1) * 2
 
     def windowing(self, kernel: Tensor):
         window = self.window_fn(
@@ -244,39 +248,17 @@ class LTVZeroPhaseFIRFilterPrecise(LTVFilterInterface):
         kernel = self.get_zero_phase_fir(log_mag)
         kernel = self.windowing(kernel)
 
-        # upsampled_kernel = linear_upsample(
-        #     kernel.transpose(1, 2).contiguous(), ctx
-        # ).transpose(1, 2)
-        upsampled_kernel = F.upsample(
-            kernel.transpose(1, 2),
-            scale_factor=ctx.hop_length,
-            mode="linear",
-            align_corners=False,
-        ).transpose(1, 2)
-
-        ex = ex[:, : upsampled_kernel.shape[1]]
-        upsampled_kernel = upsampled_kernel[:, : ex.shape[1]]
-
         padding_left = (kernel.shape[-1] - 1) // 2
-        padding_right = kernel.shape[-1] - 1 - padding_left
-
-        ex = F.pad(ex, (padding_left, padding_right), "constant", 0).unfold(
-            -1, kernel.shape[-1], 1
-        )
-        return (
-            torch.matmul(ex.unsqueeze(-2), upsampled_kernel.unsqueeze(-1))
-            .squeeze(-1)
-            .squeeze(-1)
-        )
+        return interp_fir_filt(ex, kernel, ctx.hop_length, padding=padding_left)
 
 
 class LTVZeroPhaseFIRFilter(LTVZeroPhaseFIRFilterPrecise):
-    def __init__(self, window: str, conv_method: str = "direct"):
+    def __init__(self, window: str, conv_method: str = "fft"):
         super().__init__(window=window)
         if conv_method == "direct":
-            self.convolve_fn = F.conv1d
+            self.convolve_fn = framewise_conv1d
         elif conv_method == "fft":
-            self.convolve_fn = fft_conv1d
+            self.convolve_fn = framewise_fft_conv1d
         else:
             raise ValueError(f"Unknown conv_method: {conv_method}")
 
@@ -306,15 +288,14 @@ class LTVZeroPhaseFIRFilter(LTVZeroPhaseFIRFilterPrecise):
         ), f"{unfolded.shape} != {kernel.shape}"
         kernel = kernel[:, : unfolded.shape[1]]
 
-        convolved = self.convolve_fn(
-            unfolded.reshape(1, -1, unfolded.shape[-1]),
-            kernel.reshape(-1, 1, kernel.shape[-1]),
-            groups=kernel.shape[0] * kernel.shape[1],
-        ).view(kernel.shape[0], -1)
-        return convolved
+        convolved = self.convolve_fn(unfolded, kernel)
+        return convolved.reshape(kernel.shape[0], -1)
 
 
 class LTIRadiationFilter(FilterInterface):
+    # kernel length from which FFT convolution beats direct conv1d
+    fft_threshold: int = 128
+
     def __init__(
         self,
         num_zeros: int,
@@ -329,9 +310,25 @@ class LTIRadiationFilter(FilterInterface):
             .unsqueeze(0),
         )
         self._padding = self._kernel.size(-1) // 2
+        self.use_fft = self._kernel.size(-1) >= self.fft_threshold
+        self._kernel_spectra = {}
+
+    def get_kernel_spectrum(self, n_fft: int) -> Tensor:
+        # the kernel is fixed, so its spectrum is only computed once per size
+        return cached_tensor(
+            self._kernel_spectra,
+            (n_fft, self._kernel.device, self._kernel.dtype),
+            lambda: torch.fft.rfft(self._kernel.flip(-1).view(-1), n=n_fft),
+        )
 
     def forward(self, ex: Tensor):
         assert ex.ndim == 2
+        if self.use_fft:
+            n_fft = 1 << (ex.shape[1] + self._kernel.size(-1) - 2).bit_length()
+            return torch.fft.irfft(
+                torch.fft.rfft(ex, n=n_fft) * self.get_kernel_spectrum(n_fft),
+                n=n_fft,
+            )[:, self._padding : self._padding + ex.shape[1]]
         return F.conv1d(
             ex.unsqueeze(1),
             self._kernel,
@@ -360,9 +357,7 @@ class LTIComplexConjAllpassFilter(FilterInterface):
         sin = torch.sqrt(1 - cos**2)
         roots = mag * (cos + 1j * sin)
         biquads = complex2biquads(roots)
-        a_coeffs = coeff_product(biquads.unsqueeze(1)).squeeze()
-        b_coeffs = a_coeffs.flip(0)
-        return lfilter(ex, a_coeffs, b_coeffs, False)
+        return allpass_filter(ex, biquads)
 
 
 class LTIRealCoeffAllpassFilter(LTIComplexConjAllpassFilter):
@@ -379,13 +374,17 @@ class LTIRealCoeffAllpassFilter(LTIComplexConjAllpassFilter):
             self.logits1.tanh() * self.max_abs_value,
             self.logits2.tanh() * self.max_abs_value,
         )
-        a_coeffs = coeff_product(biquads.unsqueeze(1)).squeeze()
-        b_coeffs = a_coeffs.flip(0)
-        return lfilter(ex, a_coeffs, b_coeffs, False)
+        return allpass_filter(ex, biquads)
+
+
+def mlsa_forward(mlsa: MLSA, ex: Tensor, mc: Tensor) -> Tensor:
+    return mlsa(ex, mc)
 
 
 class LTVMLSAFilter(LTVFilterInterface):
-    def __init__(self, *args, **kwargs) -> None:
+    compile_filter: bool
+
+    def __init__(self, *args, compile_filter: bool = False, **kwargs) -> None:
         super().__init__()
 
         self.mlsa = MLSA(
@@ -393,9 +392,13 @@ class LTVMLSAFilter(LTVFilterInterface):
             cascade=True,
             **kwargs,
         )
+        self.compile_filter = compile_filter
 
     def forward(self, ex: Tensor, mc: Tensor, ctx: TimeContext, **kwargs):
         minimum_frames = ex.shape[1] // self.mlsa.frame_period
         ex = ex[:, : minimum_frames * self.mlsa.frame_period]
         mc = mc[:, :minimum_frames]
+        if self.compile_filter:
+            # the submodule is passed in, so copies and moved modules run their own
+            return compiled(mlsa_forward)(self.mlsa, ex, mc)
         return self.mlsa(ex, mc)
@@ -28,19 +28,9 @@ class HarmonicPlusNoiseSynth(nn.Module):
         # Static components
         self.end_filter = end_filter
 
-    def forward(
-        self,
-        ctx: TimeContext,
-        phase_params: Tuple[Tensor, Optional[Tensor]],
-        harm_osc_params: Tuple[Tensor, ...],
-        harm_filt_params: Tuple[Tensor, ...],
-        noise_filt_params: Tuple[Tensor, ...],
-        noise_params: Tuple[Tensor, ...] = (),
+    def _upsample_phase(
+        self, phase_params: Tuple[Tensor, Optional[Tensor]], ctx: TimeContext
     ) -> Tensor:
-        """
-        Args:
-            phase: (batch_size, samples)
-        """
         phase, *_ = phase_params
         assert torch.all(phase >= 0) and torch.all(phase <= 0.5)
         upsampled_phase = linear_upsample(phase, ctx)
@@ -50,16 +40,188 @@ class HarmonicPlusNoiseSynth(nn.Module):
             assert torch.all(voicing >= 0) and torch.all(voicing <= 1)
             upsampled_voicing = linear_upsample(voicing, ctx)
             upsampled_phase = upsampled_phase * upsampled_voicing
+        return upsampled_phase
 
+    def _synthesize(
+        self,
+        ctx: TimeContext,
+        upsampled_phase: Tensor,
+        harm_osc_params: Tuple[Tensor, ...],
+        harm_filt_params: Tuple[Tensor, ...],
+        noise_filt_params: Tuple[Tensor, ...],
+        noise_params: Tuple[Tensor, ...],
+        **osc_kwargs,
+    ) -> Tensor:
         # Time-varying components
-        harm_osc = self.harm_oscillator(upsampled_phase, *harm_osc_params, ctx=ctx)
+        harm_osc = self.harm_oscillator(
+            upsampled_phase, *harm_osc_params, ctx=ctx, **osc_kwargs
+        )
         noise = self.noise_generator(harm_osc, *noise_params, ctx=ctx)
         if self.harm_filter is not None:
             harm_osc = self.harm_filter(harm_osc, *harm_filt_params, ctx=ctx)
         if self.noise_filter is not None:
             noise = self.noise_filter(noise, *noise_filt_params, ctx=ctx)
 
-        out = harm_osc[:, : noise.shape[1]] + noise[:, : harm_osc.shape[1]]
+        length = min(harm_osc.shape[1], noise.shape[1])
+        if torch.is_grad_enabled():
+            return harm_osc[:, :length] + noise[:, :length]
+        # both are fresh buffers at this point, accumulate in place
+        return noise[:, :length].add_(harm_osc[:, :length])
+
+    def forward(
+        self,
+        ctx: TimeContext,
+        phase_params: Tuple[Tensor, Optional[Tensor]],
+        harm_osc_params: Tuple[Tensor, ...],
+        harm_filt_params: Tuple[Tensor, ...],
+        noise_filt_params: Tuple[Tensor, ...],
+        noise_params: Tuple[Tensor, ...] = (),
+    ) -> Tensor:
+        """
+        Args:
+            phase: (batch_size, samples)
+        """
+        upsampled_phase = self._upsample_phase(phase_params, ctx)
+        out = self._synthesize(
+            ctx,
+            upsampled_phase,
+            harm_osc_params,
+            harm_filt_params,
+            noise_filt_params,
+            noise_params,
+        )
+
+        # Static components
+        if self.end_filter is not None:
+            return self.end_filter(out)
+        else:
+            return out
+
+    def forward_chunked(
+        self,
+        ctx: TimeContext,
+        phase_params: Tuple[Tensor, Optional[Tensor]],
+        harm_osc_params: Tuple[Tensor, ...],
+        harm_filt_params: Tuple[Tensor, ...],
+        noise_filt_params: Tuple[Tensor, ...],
+        noise_params: Tuple[Tensor, ...] = (),
+        chunk_frames: int = 1000,
+        overlap_frames: int = 16,
+        context_frames: Optional[int] = None,
+    ) -> Tensor:
+        """
+        Same as forward, but synthesize the time-varying components in chunks of
+        `chunk_frames` frames and crossfade consecutive chunks over
+        `overlap_frames` frames with a Hann window, so peak memory does not grow
+        with the input length. All parameters are expected to have frames on
+        dim 1. The oscillator phase is carried across chunks and the static
+        components run once on the joined output.
+
+        Every crossfade has `context_frames` frames of context on each side, so
+        what the chunk edges see (zero padding, missing filter history) is
+        dropped. By default the context covers the support of `harm_filter` and
+        `noise_filter`, plus one frame for the frame-rate interpolation. Filters
+        with unbounded support (e.g. MLSA) need an explicit `context_frames`.
+        Oscillators with a `hop_rate` (the downsampled glottal flow tables) pool
+        their controls over `hop_rate` frames. For them, chunks start on that
+        frame grid and the context is at least `hop_rate` frames, so the
+        zero-padded pooling windows at the chunk edges are dropped as well.
+        """
+        assert 0 < overlap_frames < chunk_frames
+        num_frames = phase_params[0].shape[1]
+        if num_frames <= chunk_frames:
+            return self(
+                ctx,
+                phase_params,
+                harm_osc_params,
+                harm_filt_params,
+                noise_filt_params,
+                noise_params,
+            )
+
+        hop_length = ctx.hop_length
+        hop_rate = getattr(self.harm_oscillator, "hop_rate", 1)
+        if context_frames is None:
+            support = 0
+            for filt, params in (
+                (self.harm_filter, harm_filt_params),
+                (self.noise_filter, noise_filt_params),
+            ):
+                if filt is None:
+                    continue
+                filt_support = (
+                    filt.support(*params) if hasattr(filt, "support") else None
+                )
+                if filt_support is None:
+                    raise ValueError(
+                        f"{type(filt).__name__} does not report its support, "
+                        "pass context_frames explicitly"
+                    )
+                support = max(support, filt_support)
+            context_frames = -(-support // hop_length) + 1 if support else 0
+        context = max(context_frames, 0 if hop_rate == 1 else hop_rate)
+        step = (chunk_frames - overlap_frames - 2 * context) // hop_rate * hop_rate
+        assert step > 0, (
+            f"chunk_frames={chunk_frames} is too short for overlap_frames="
+            f"{overlap_frames} with hop_rate={hop_rate} and {context} context "
+            "frames"
+        )
+        # position of the crossfade within a chunk, relative to the next chunk
+        skip = context * hop_length
+        chunks = []
+        tail = None
+        phase_offset = None
+        start = 0
+        while True:
+            end = min(start + chunk_frames, num_frames)
+            chunk_params = [
+                tuple(p[:, start:end] for p in params)
+                for params in (
+                    phase_params,
+                    harm_osc_params,
+                    harm_filt_params,
+                    noise_filt_params,
+                    noise_params,
+                )
+            ]
+            upsampled_phase = self._upsample_phase(chunk_params[0], ctx)
+            osc_kwargs = (
+                {} if phase_offset is None else {"upsampled_phase_offset": phase_offset}
+            )
+            out = self._synthesize(
+                ctx, upsampled_phase, *chunk_params[1:], **osc_kwargs
+            )
+
+            if tail is None:
+                out_start = 0
+            else:
+                # the previous chunk already covers the samples before the tail
+                out_start = skip
+                overlap = tail.shape[1]
+                fade = torch.hann_window(
+                    overlap * 2, device=out.device, dtype=out.dtype
+                )
+                out = torch.cat(
+                    [
+                        tail * fade[overlap:]
+                        + out[:, skip : skip + overlap] * fade[:overlap],
+                        out[:, skip + overlap :],
+                    ],
+                    dim=1,
+                )
+            if end == num_frames:
+                chunks.append(out)
+                break
+
+            cut = step * hop_length + skip - out_start
+            chunks.append(out[:, :cut])
+            tail = out[:, cut : cut + overlap_frames * hop_length]
+            offset = upsampled_phase[:, : step * hop_length].sum(1, keepdim=True)
+            phase_offset = offset if phase_offset is None else phase_offset + offset
+            phase_offset = phase_offset % 1
+            start += step
+
+        out = torch.cat(chunks, dim=1)
 
         # Static components
         if self.end_filter is not None:
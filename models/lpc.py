@@ -5,18 +5,25 @@ from torchaudio.functional import lfilter
 from typing import Optional, Union, List, Tuple, Callable
 
 
-from .utils import get_window_fn
+from .utils import get_window_fn, overlap_add, OverlapAddStateMixin
 
 
 def lpc_synthesis(source: Tensor, gains: Tensor, a: Tensor):
+    """
+    source: (num_filters, seq_len)
+    gains: (num_filters,)
+    a: (num_filters, order)
+    """
     order = a.shape[-1] + 1
     b = a.new_zeros(a.shape[:-1] + (order,))
     b[..., 0] = gains
     a = torch.cat([a.new_ones(a.shape[:-1] + (1,)), a], dim=-1)
-    return lfilter(source, a, b, False)
+    # filter bank mode, each row of source is filtered by its own coefficients
+    # in a single call
+    return lfilter(source, a, b, clamp=False, batching=True)
 
 
-class LPCSynth(nn.Module):
+class LPCSynth(OverlapAddStateMixin, nn.Module):
     def __init__(
         self,
         hop_length: int,
@@ -28,9 +35,7 @@ class LPCSynth(nn.Module):
         self.hop_length = hop_length
         self.window_size = hop_length * 4 if window_size is None else window_size
         self.padding = (self.window_size - self.hop_length) // 2
-        self.register_buffer(
-            "_kernel", torch.diag(window_fn(self.window_size)).unsqueeze(1)
-        )
+        self.register_buffer("_window", window_fn(self.window_size), persistent=False)
 
     def forward(self, ex: Tensor, lpc: Tensor):
         assert ex.ndim == 1
@@ -43,18 +48,8 @@ class LPCSynth(nn.Module):
         gain, a = lpc[..., 0], lpc[..., 1:]
         filtered = lpc_synthesis(unfolded, gain, a)
 
-        # overlap-add
-        filtered = filtered.t().unsqueeze(0)
-        y = F.conv_transpose1d(
-            filtered, self._kernel, stride=self.hop_length, padding=self.padding
-        ).squeeze()
-
-        # normalize
-        ones = torch.ones_like(filtered)
-        norm = F.conv_transpose1d(
-            ones, self._kernel, stride=self.hop_length, padding=self.padding
-        ).squeeze()
-        return y / norm
+        # overlap-add and normalize
+        return overlap_add(filtered, self._window, self.hop_length, self.padding)
 
 
 class BatchLPCSynth(LPCSynth):
@@ -76,19 +71,8 @@ class BatchLPCSynth(LPCSynth):
         a = a.reshape(-1, a.shape[-1])
         filtered = lpc_synthesis(unfolded, gain, a).view(batch, frames, -1)
 
-        # overlap-add
-        filtered = filtered.transpose(1, 2)
-        ones = filtered.new_ones(1, filtered.shape[1], filtered.shape[2])
-        tmp = torch.cat([filtered, ones], dim=0)
-        tmp = F.conv_transpose1d(
-            tmp, self._kernel, stride=self.hop_length, padding=self.padding
-        ).squeeze(1)
-
-        y = tmp[:-1]
-        norm = tmp[-1]
-
-        # normalize
-        return y / norm
+        # overlap-add and normalize
+        return overlap_add(filtered, self._window, self.hop_length, self.padding)
 
 
 class BatchSecondOrderLPCSynth(LPCSynth):
@@ -117,15 +101,7 @@ class BatchSecondOrderLPCSynth(LPCSynth):
         for i in range(biquads.shape[-2]):
             unfolded = lfilter(unfolded, biquads[..., i, :], b, False)
 
-        filtered = unfolded.view(batch, frames, -1).transpose(1, 2)
-        ones = filtered.new_ones(1, filtered.shape[1], filtered.shape[2])
-        tmp = torch.cat([filtered, ones], dim=0)
-        tmp = F.conv_transpose1d(
-            tmp, self._kernel, stride=self.hop_length, padding=self.padding
-        ).squeeze(1)
-
-        y = tmp[:-1]
-        norm = tmp[-1]
+        filtered = unfolded.view(batch, frames, -1)
 
-        # normalize
-        return y / norm
+        # overlap-add and normalize
+        return overlap_add(filtered, self._window, self.hop_length, self.padding)
@@ -4,7 +4,14 @@ import torch.nn.functional as F
 import math
 from typing import Optional, Union, List, Tuple, Callable
 
-from .utils import get_transformed_lf, TimeContext, linear_upsample, smooth_phase_offset
+from .utils import (
+    get_transformed_lf,
+    TimeContext,
+    linear_upsample,
+    smooth_phase_offset,
+    cached_tensor,
+    compiled,
+)
 
 
 __all__ = [
@@ -27,6 +34,15 @@ def check_weight_hook(m, args):
     assert torch.all(weight >= 0) and torch.all(weight <= 1)
 
 
+def wrap_phase(
+    upsampled_phase: Tensor, upsampled_phase_offset: Optional[Tensor] = None
+) -> Tensor:
+    wrapped_phase = upsampled_phase.cumsum(1)
+    if upsampled_phase_offset is not None:
+        wrapped_phase.add_(upsampled_phase_offset)
+    return wrapped_phase.sub_(wrapped_phase.floor())
+
+
 class OscillatorInterface(nn.Module):
     def __init__(self) -> None:
         super().__init__()
@@ -51,6 +67,7 @@ class GlottalFlowTable(OscillatorInterface):
         trainable: bool = False,
         min_R_d: float = 0.3,
         max_R_d: float = 2.7,
+        compile_phase: bool = False,
         **kwargs,
     ):
         super().__init__()
@@ -79,10 +96,11 @@ class GlottalFlowTable(OscillatorInterface):
             else:
                 peak_pos = table.argmax(dim=1)
 
-            align_peak_pos = peak_pos.max().item()
-            peak_pos = peak_pos.tolist()
-            for i in range(table.shape[0]):
-                table[i] = torch.roll(table[i], align_peak_pos - peak_pos[i])
+            # roll every table so that the peaks line up
+            shifts = peak_pos.max() - peak_pos
+            table_length = table.shape[1]
+            index = (torch.arange(table_length) - shifts.unsqueeze(1)) % table_length
+            table = table.gather(1, index)
 
         if normalize_method == "constant_power":
             # normalize to constant power
@@ -102,9 +120,28 @@ class GlottalFlowTable(OscillatorInterface):
             self.register_buffer("table", table)
 
         # self._table_weight_handle = self.register_forward_pre_hook(check_weight_hook)
+        self._frame_ramps = {}
+        self.compile_phase = compile_phase
+
+    def _wrap_phase(
+        self, upsampled_phase: Tensor, upsampled_phase_offset: Optional[Tensor]
+    ) -> Tensor:
+        if self.compile_phase:
+            # let inductor fuse the offset and wrapping into the cumsum
+            return compiled(wrap_phase)(upsampled_phase, upsampled_phase_offset)
+        return wrap_phase(upsampled_phase, upsampled_phase_offset)
+
+    def get_frame_ramp(self, hop_length: int, device, dtype) -> Tensor:
+        # interpolation weights between consecutive frames, fixed per hop_length
+        return cached_tensor(
+            self._frame_ramps,
+            (hop_length, device, dtype),
+            lambda: torch.arange(hop_length, device=device, dtype=dtype) / hop_length,
+        )
 
-    @staticmethod
-    def generate(wrapped_phase: Tensor, tables: Tensor, ctx: TimeContext) -> Tensor:
+    def generate(
+        self, wrapped_phase: Tensor, tables: Tensor, ctx: TimeContext
+    ) -> Tensor:
         """
         Args:
             wrapped_phase: (batch, seq_len)
@@ -113,10 +150,12 @@ class GlottalFlowTable(OscillatorInterface):
         """
         batch, seq_len = wrapped_phase.shape
         hop_length = ctx.hop_length
-        # pad phase to have multiple of hop_length
+        # pad phase to have multiple of hop_length, the padded samples are
+        # dropped at the end so their value doesn't matter
         pad_length = (hop_length - seq_len % hop_length) % hop_length
-        wrapped_phase = F.pad(wrapped_phase, (0, pad_length), "replicate")
-        wrapped_phase = wrapped_phase.view(batch, -1, hop_length)
+        if pad_length:
+            wrapped_phase = F.pad(wrapped_phase, (0, pad_length))
+        wrapped_phase = wrapped_phase.reshape(batch, -1, hop_length)
 
         # make sure flow has seq_len / hop_length + 1 frames
         if tables.shape[1] < wrapped_phase.shape[1] + 1:
@@ -136,55 +175,22 @@ class GlottalFlowTable(OscillatorInterface):
         # shape = (batch, seq_len / hop_length, hop_length)
         p = table_index_raw - floor_index
 
-        # shape = (batch, seq_len / hop_length + 1, table_length + 1)
-        padded_tables = torch.cat([tables, tables[:, :, :1]], dim=2)
-        floor_flow = padded_tables[:, :-1]
-        ceil_flow = padded_tables[:, 1:]
-        p2 = (
-            torch.arange(
-                hop_length, device=wrapped_phase.device, dtype=wrapped_phase.dtype
-            )
-            / hop_length
-        )
+        floor_flow = tables[:, :-1]
+        ceil_flow = tables[:, 1:]
+        p2 = self.get_frame_ramp(hop_length, wrapped_phase.device, wrapped_phase.dtype)
+        # wrap around to the start of the table
+        ceil_index = (floor_index + 1) % table_length
 
         # first, pick floor flow
-        # create dummy index to select floor flow
-        dummy_index_0 = (
-            torch.arange(batch, device=wrapped_phase.device)
-            .view(-1, 1, 1)
-            .repeat(1, wrapped_phase.shape[1], hop_length)
-            .flatten()
-        )
-        dummy_index_1 = (
-            torch.arange(wrapped_phase.shape[1], device=wrapped_phase.device)
-            .view(1, -1, 1)
-            .repeat(batch, 1, hop_length)
-            .flatten()
-        )
-        dummy_index_2 = floor_index.flatten()
-        selected_floor_flow = (
-            floor_flow[dummy_index_0, dummy_index_1, dummy_index_2].view(
-                *wrapped_phase.shape
-            )
-            * (1 - p)
-            + floor_flow[dummy_index_0, dummy_index_1, dummy_index_2 + 1].view(
-                *wrapped_phase.shape
-            )
-            * p
+        selected_floor_flow = torch.lerp(
+            floor_flow.gather(2, floor_index), floor_flow.gather(2, ceil_index), p
         )
 
         # second, pick ceil flow
-        selected_ceil_flow = (
-            ceil_flow[dummy_index_0, dummy_index_1, dummy_index_2].view(
-                *wrapped_phase.shape
-            )
-            * (1 - p)
-            + ceil_flow[dummy_index_0, dummy_index_1, dummy_index_2 + 1].view(
-                *wrapped_phase.shape
-            )
-            * p
+        selected_ceil_flow = torch.lerp(
+            ceil_flow.gather(2, floor_index), ceil_flow.gather(2, ceil_index), p
         )
-        final_flow = selected_floor_flow * (1 - p2) + selected_ceil_flow * p2
+        final_flow = torch.lerp(selected_floor_flow, selected_ceil_flow, p2)
         final_flow = final_flow.view(batch, -1)[:, :seq_len]
 
         return final_flow
@@ -219,20 +225,16 @@ class IndexedGlottalFlowTable(GlottalFlowTable):
         floor_index = table_index_raw.long().clip_(0, num_tables - 2)
         p = table_index_raw - floor_index
         p = p.unsqueeze(-1)
+        floor_index = floor_index.flatten()
         interp_tables = (
-            self.table[floor_index.flatten()].view(
-                floor_index.shape[0], floor_index.shape[1], table_length
-            )
+            self.table.index_select(0, floor_index).view(*p.shape[:2], table_length)
             * (1 - p)
-            + self.table[floor_index.flatten() + 1].view(
-                floor_index.shape[0], floor_index.shape[1], table_length
+            + self.table.index_select(0, floor_index + 1).view(
+                *p.shape[:2], table_length
             )
             * p
         )
-        wrapped_phase = upsampled_phase.cumsum(1)
-        if upsampled_phase_offset is not None:
-            wrapped_phase = upsampled_phase_offset + wrapped_phase
-        wrapped_phase = wrapped_phase % 1
+        wrapped_phase = self._wrap_phase(upsampled_phase, upsampled_phase_offset)
         return self.generate(wrapped_phase, interp_tables, ctx)
 
 
@@ -250,10 +252,7 @@ class WeightedGlottalFlowTable(GlottalFlowTable):
             table_select_weight <= 1
         )
         weighted_tables = table_select_weight @ self.table
-        wrapped_phase = upsampled_phase.cumsum(1)
-        if upsampled_phase_offset is not None:
-            wrapped_phase = upsampled_phase_offset + wrapped_phase
-        wrapped_phase = wrapped_phase % 1
+        wrapped_phase = self._wrap_phase(upsampled_phase, upsampled_phase_offset)
         return self.generate(wrapped_phase, weighted_tables, ctx)
 
 
@@ -345,6 +344,17 @@ class DownsampledWeightedGlottalFlowTable(WeightedGlottalFlowTable):
 class HarmonicOscillator(OscillatorInterface):
     """synthesize audio with a bank of harmonic oscillators"""
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._harmonic_numbers = {}
+
+    def get_harmonic_numbers(self, n_harmonic: int, device, dtype) -> Tensor:
+        return cached_tensor(
+            self._harmonic_numbers,
+            (n_harmonic, device, dtype),
+            lambda: torch.arange(1, n_harmonic + 1, device=device, dtype=dtype),
+        )
+
     def forward(
         self,
         upsampled_phase: Tensor,
@@ -364,20 +374,20 @@ class HarmonicOscillator(OscillatorInterface):
 
         # harmonic synth
         n_harmonic = amplitudes.shape[-1]
-        harmonics = upsampled_phase.unsqueeze(-1) * torch.arange(1, n_harmonic + 1).to(
-            upsampled_phase.device
+        harmonic_numbers = self.get_harmonic_numbers(
+            n_harmonic, upsampled_phase.device, upsampled_phase.dtype
         )
-        alias_mask = harmonics >= 0.5
+        # harmonic k aliases once k * phase reaches 0.5
+        alias_threshold = 0.5 / upsampled_phase
 
-        phase = torch.cumsum(harmonics, axis=1)
-        if upsampled_phase_offset is not None:
-            upsampled_phase_offset = upsampled_phase_offset % 1
-            phase = phase + upsampled_phase_offset.unsqueeze(-1) * torch.arange(
-                1, n_harmonic + 1
-            ).to(upsampled_phase.device)
+        # all harmonics share the same cumulative phase, and wrapping it before
+        # scaling by the (integer) harmonic number leaves the signal unchanged,
+        # convert to radians before broadcasting over the harmonics
+        phase = wrap_phase(upsampled_phase, upsampled_phase_offset) * (2 * torch.pi)
+        phase = phase.unsqueeze(-1) * harmonic_numbers
 
         if initial_phase is not None:
-            phase = phase + initial_phase.unsqueeze(1)
+            phase = phase + initial_phase.unsqueeze(1) * (2 * torch.pi)
 
         if ctx.hop_length > 1:
             amplitudes = linear_upsample(amplitudes.transpose(1, 2), ctx).transpose(
@@ -386,17 +396,13 @@ class HarmonicOscillator(OscillatorInterface):
         valid_length = min(amplitudes.shape[1], phase.shape[1])
         amplitudes = amplitudes[:, :valid_length]
         phase = phase[:, :valid_length]
-        alias_mask = alias_mask[:, :valid_length]
+        alias_threshold = alias_threshold[:, :valid_length, None]
 
         # anti-aliasing
-        amplitudes = torch.where(alias_mask, 0, amplitudes)
+        amplitudes = amplitudes.masked_fill(harmonic_numbers >= alias_threshold, 0)
 
         # signal
-        return (
-            (torch.sin(phase * 2 * torch.pi)[..., None, :] @ amplitudes[..., None])
-            .squeeze(-1)
-            .squeeze(-1)
-        )
+        return torch.einsum("bth,bth->bt", torch.sin(phase), amplitudes)
 
 
 class SawToothOscillator(HarmonicOscillator):
@@ -432,9 +438,9 @@ class PulseTrain(OscillatorInterface):
             wrapped_phase = upsampled_phase_offset + wrapped_phase
         wrapped_phase = wrapped_phase % 1
         phase_transition = (wrapped_phase[:, 1:] - wrapped_phase[:, :-1]) < 0
-        out = torch.zeros_like(upsampled_phase)
-        out[:, 1:][phase_transition] = upsampled_phase[:, 1:][phase_transition].rsqrt()
-        return out
+        # keep rsqrt finite off the transitions, unvoiced phase is zero
+        pulses = torch.where(phase_transition, upsampled_phase[:, 1:], 1).rsqrt()
+        return F.pad(pulses * phase_transition, (1, 0))
 
 
 class AdditivePulseTrain(HarmonicOscillator):
@@ -449,13 +455,10 @@ class AdditivePulseTrain(HarmonicOscillator):
         upsampled_phase_offset: Optional[Tensor] = None,
         **kwargs,
     ) -> Tensor:
+        num_freq_bins = 0.5 / upsampled_phase
         amplitudes = (
-            torch.ones_like(upsampled_phase)
-            .unsqueeze(-1)
-            .repeat(1, 1, self.num_harmonics)
+            num_freq_bins.rsqrt().unsqueeze(-1).expand(-1, -1, self.num_harmonics)
         )
-        num_freq_bins = 0.5 / upsampled_phase
-        amplitudes = amplitudes * num_freq_bins.unsqueeze(-1).rsqrt()
         ctx = TimeContext(1)
         return super().forward(
             upsampled_phase, amplitudes, ctx, initial_phase, upsampled_phase_offset
@@ -2,9 +2,10 @@ import torch
 from torch import Tensor
 import numpy as np
 import pyworld as pw
-from functools import partial
+from functools import partial, lru_cache
 import torch.nn.functional as F
 import math
+from torchaudio.functional import lfilter
 from typing import Callable, Optional, Tuple, Union, List
 
 
@@ -101,6 +102,120 @@ def fir_filt(x: torch.Tensor, h: torch.Tensor):
     )
 
 
+def framewise_conv1d(frames: Tensor, kernels: Tensor, flip: bool = False) -> Tensor:
+    """
+    frames: (batch, frames, frame_len)
+    kernels: (batch, frames, filter_len)
+    flip: convolve instead of cross-correlate
+    ---
+    out: (batch, frames, frame_len - filter_len + 1)
+    """
+    if flip:
+        kernels = kernels.flip(-1)
+    return F.conv1d(
+        frames.reshape(1, -1, frames.shape[-1]),
+        kernels.reshape(-1, 1, kernels.shape[-1]),
+        groups=kernels.shape[0] * kernels.shape[1],
+    ).view(*kernels.shape[:2], -1)
+
+
+def framewise_fft_conv1d(frames: Tensor, kernels: Tensor, flip: bool = False) -> Tensor:
+    """
+    Same as framewise_conv1d (valid cross-correlation), but computed with one
+    batched rfft/irfft over all the frames. Convolution (flip=True) uses the
+    kernel spectrum as is, so the kernels are never reversed in time.
+    frames: (batch, frames, frame_len)
+    kernels: (batch, frames, filter_len)
+    """
+    frame_len, filter_len = frames.shape[-1], kernels.shape[-1]
+    n_fft = 1 << (frame_len - 1).bit_length()
+    X = torch.fft.rfft(frames, n=n_fft)
+    H = torch.fft.rfft(kernels, n=n_fft)
+    if flip:
+        return torch.fft.irfft(X * H, n=n_fft)[..., filter_len - 1 : frame_len]
+    return torch.fft.irfft(X * H.conj(), n=n_fft)[..., : frame_len - filter_len + 1]
+
+
+def interp_fir_filt(
+    x: Tensor, h: Tensor, hop_length: int, padding: int = 0, flip: bool = False
+):
+    """
+    Same as per-sample FIR filtering with `h` linearly upsampled to sample rate
+    (F.interpolate(mode="linear", align_corners=False)), but without computing
+    the upsampled kernels. Each frame's kernel is applied to a two-hop segment,
+    weighted by its interpolation weights, and the segments are overlap-added.
+    x: (batch, seq_len)
+    h: (batch, frames, filter_len), applied as cross-correlation
+    padding: number of zeros padded to the left of x
+    flip: convolve with h instead of cross-correlating
+    ---
+    out: (batch, min(seq_len, frames * hop_length))
+    """
+    frames, filter_len = h.shape[1:]
+    seq_len = min(x.shape[1], frames * hop_length)
+    offset = hop_length // 2
+
+    # frame i produces outputs [i * hop_length - offset, (i + 2) * hop_length - offset)
+    segment_len = 2 * hop_length + filter_len - 1
+    x = x[:, :seq_len]
+    x = F.pad(
+        x,
+        (
+            padding + offset,
+            (frames + 1) * hop_length + filter_len - 1 - seq_len - padding - offset,
+        ),
+    )
+    y = framewise_fft_conv1d(x.unfold(-1, segment_len, hop_length), h, flip=flip)
+
+    frame_index = torch.arange(frames, device=x.device, dtype=x.dtype)
+    t = (
+        torch.arange(2 * hop_length, device=x.device, dtype=x.dtype)
+        + frame_index[:, None] * hop_length
+        - offset
+    )
+    src_index = ((t + 0.5) / hop_length - 0.5).clamp(0, frames - 1)
+    weight = (1 - (src_index - frame_index[:, None]).abs()).clamp_min(0)
+    y = y * weight
+
+    y = F.pad(y[..., :hop_length], (0, 0, 0, 1)) + F.pad(
+        y[..., hop_length:], (0, 0, 1, 0)
+    )
+    return y.reshape(y.shape[0], -1)[:, offset : offset + seq_len]
+
+
+def overlap_add(
+    frames: Tensor, window: Tensor, hop_length: int, padding: int = 0
+) -> Tensor:
+    """
+    Windowed overlap-add, normalized by the overlapped window.
+    frames: (..., num_frames, window_size)
+    window: (window_size,)
+    ---
+    out: (..., (num_frames - 1) * hop_length + window_size - 2 * padding)
+    """
+    num_frames, window_size = frames.shape[-2:]
+    out_length = (num_frames - 1) * hop_length + window_size
+    index = (
+        torch.arange(num_frames, device=frames.device)[:, None] * hop_length
+        + torch.arange(window_size, device=frames.device)
+    ).flatten()
+
+    windowed = (frames * window).reshape(-1, num_frames * window_size)
+    y = windowed.new_zeros(windowed.shape[0], out_length).index_add_(1, index, windowed)
+    norm = window.new_zeros(out_length).index_add_(0, index, window.repeat(num_frames))
+
+    y = y[:, padding : out_length - padding] / norm[padding : out_length - padding]
+    return y.view(*frames.shape[:-2], -1)
+
+
+class OverlapAddStateMixin(object):
+    """Load checkpoints that stored the overlap-add window as a diagonal kernel."""
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        state_dict.pop(prefix + "_kernel", None)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+
 def coeff_product(polynomials: Union[Tensor, List[Tensor]]) -> Tensor:
     n = len(polynomials)
     if n == 1:
@@ -137,6 +252,19 @@ def params2biquads(param1: Tensor, param2: Tensor) -> Tensor:
     return torch.stack([torch.ones_like(a1), a1, a2], dim=-1)
 
 
+def allpass_filter(x: Tensor, biquads: Tensor) -> Tensor:
+    """
+    Filter x with the allpass filter whose denominator is the product of the
+    given second-order sections, in a single lfilter call. This is faster than
+    cascading the sections, at the cost of float32 accuracy on the high-order
+    polynomial for many sections.
+    x: (..., seq_len)
+    biquads: (num_sections, 3), denominator coefficients of each section
+    """
+    a_coeffs = coeff_product(biquads.unsqueeze(1)).squeeze(0)
+    return lfilter(x, a_coeffs, a_coeffs.flip(0), False)
+
+
 def biquads2lpc(biquads: Tensor) -> Tensor:
     assert biquads.shape[-1] == 3
     return coeff_product(biquads.view(-1, *biquads.shape[-2:]).transpose(0, 1)).view(
@@ -185,6 +313,21 @@ def get_logits2biquads(
     return logits2coeff
 
 
+def cached_tensor(cache: dict, key, fn: Callable[[], Tensor]) -> Tensor:
+    if key not in cache:
+        # compute outside inference_mode so the cached tensor stays usable by autograd
+        with torch.inference_mode(False):
+            cache[key] = fn()
+    return cache[key]
+
+
+@lru_cache(maxsize=None)
+def compiled(fn: Callable) -> Callable:
+    # compiled once per function and kept off the modules, so they stay
+    # picklable and deep copies do not call into the original module
+    return torch.compile(fn, dynamic=True)
+
+
 class TimeContext(object):
     hop_length: int
 
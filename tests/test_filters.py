@@ -0,0 +1,133 @@
+import pytest
+import torch
+import torch.nn.functional as F
+
+from models.filters import (
+    LTIRadiationFilter,
+    LTVMinimumPhaseFIRFilter,
+    LTVMinimumPhaseFIRFilterPrecise,
+    LTVZeroPhaseFIRFilter,
+    LTVZeroPhaseFIRFilterPrecise,
+)
+from models.utils import (
+    TimeContext,
+    allpass_filter,
+    complex2biquads,
+    fir_filt,
+    hilbert,
+    interp_fir_filt,
+)
+from torchaudio.functional import lfilter
+
+
+@pytest.mark.parametrize(
+    "filter_cls", [LTVMinimumPhaseFIRFilter, LTVZeroPhaseFIRFilter]
+)
+@pytest.mark.parametrize("n_fft", [128, 512])
+def test_fft_conv_matches_direct(filter_cls, n_fft):
+    hop_size = 80
+    frames = 20
+    ctx = TimeContext(hop_size)
+    ex = torch.randn(2, frames * hop_size)
+    log_mag = torch.randn(2, frames, n_fft // 2 + 1) * 0.5
+
+    direct = filter_cls("hanning", conv_method="direct")(ex, log_mag, ctx)
+    fft = filter_cls("hanning", conv_method="fft")(ex, log_mag, ctx)
+    assert fft.shape == direct.shape
+    assert torch.allclose(fft, direct, atol=1e-4)
+
+
+@pytest.mark.parametrize("n_fft", [128, 512])
+def test_minimum_phase_fir(n_fft):
+    log_mag = torch.randn(2, 20, n_fft // 2 + 1, dtype=torch.double)
+    # minimum phase from the hilbert transform of the two-sided log-magnitude
+    full_log_mag = torch.cat([log_mag, log_mag.flip(-1)[..., 1:-1]], dim=-1)
+    min_phase = -hilbert(full_log_mag, dim=-1).imag
+    expected = torch.fft.ifft(torch.exp(full_log_mag + 1j * min_phase), dim=-1).real
+
+    kernel = LTVMinimumPhaseFIRFilterPrecise.get_minimum_phase_fir(log_mag)
+    assert kernel.shape == expected.shape
+    assert torch.allclose(kernel, expected, atol=1e-10)
+
+
+@pytest.mark.parametrize("n_fft", [128, 512])
+def test_zero_phase_fir(n_fft):
+    log_mag = torch.randn(2, 20, n_fft // 2 + 1, dtype=torch.double)
+    # zero-phase response centered by a circular shift of half the kernel
+    expected = torch.fft.fftshift(
+        torch.fft.irfft(torch.exp(log_mag) + 0j, dim=-1), dim=-1
+    )
+
+    kernel = LTVZeroPhaseFIRFilterPrecise.get_zero_phase_fir(log_mag)
+    assert kernel.shape == expected.shape
+    assert torch.allclose(kernel, expected, atol=1e-10)
+
+
+@pytest.mark.parametrize("num_zeros", [64, 100])
+@pytest.mark.parametrize("seq_length", [100, 1600, 1637])
+def test_radiation_fft_matches_conv1d(num_zeros, seq_length):
+    ex = torch.randn(2, seq_length)
+    filt = LTIRadiationFilter(num_zeros)
+    assert filt.use_fft
+
+    expected = F.conv1d(
+        ex.unsqueeze(1), filt._kernel, padding=filt._kernel.size(-1) // 2
+    ).squeeze(1)
+    y = filt(ex)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("hop_size", [1, 63, 80])
+@pytest.mark.parametrize("seq_length", [1590, 1600, 1650])
+def test_interp_fir_filt(hop_size, seq_length):
+    frames = 20
+    x = torch.randn(2, seq_length)
+    h = torch.randn(2, frames, 33)
+    upsampled_h = F.interpolate(
+        h.transpose(1, 2), scale_factor=hop_size, mode="linear", align_corners=False
+    ).transpose(1, 2)
+    length = min(seq_length, upsampled_h.shape[1])
+    expected = fir_filt(x[:, :length], upsampled_h[:, :length])
+
+    y = interp_fir_filt(x, h.flip(-1), hop_size, padding=h.shape[-1] - 1)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-4)
+
+
+def allpass_biquads(num_roots, max_abs_value):
+    generator = torch.Generator().manual_seed(num_roots)
+    roots = torch.polar(
+        torch.rand(num_roots, generator=generator, dtype=torch.double)
+        * max_abs_value,
+        torch.rand(num_roots, generator=generator, dtype=torch.double) * torch.pi,
+    )
+    return complex2biquads(roots)
+
+
+def allpass_cascade(x, biquads):
+    for a in biquads:
+        x = lfilter(x, a, a.flip(0), False)
+    return x
+
+
+@pytest.mark.parametrize("num_roots", [2, 8, 16])
+def test_allpass_filter(num_roots):
+    x = torch.randn(2, 4000, dtype=torch.double)
+    biquads = allpass_biquads(num_roots, 0.99)
+    expected = allpass_cascade(x, biquads)
+
+    y = allpass_filter(x, biquads)
+    assert torch.allclose(y, expected, atol=1e-8)
+
+
+@pytest.mark.parametrize("num_roots", [2, 4, 8])
+def test_allpass_filter_float32(num_roots):
+    # the single high-order polynomial loses precision in float32, so only
+    # check well-conditioned sections here
+    x = torch.randn(2, 4000, dtype=torch.double)
+    biquads = allpass_biquads(num_roots, 0.9)
+    expected = allpass_cascade(x, biquads)
+
+    y = allpass_filter(x.float(), biquads.float())
+    assert torch.allclose(y.double(), expected, atol=1e-3)
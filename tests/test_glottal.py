@@ -1,7 +1,12 @@
 import pytest
 import torch
 
-from models.synth import GlottalFlowTable
+from models.synth import (
+    GlottalFlowTable,
+    IndexedGlottalFlowTable,
+    WeightedGlottalFlowTable,
+)
+from models.utils import TimeContext
 
 
 @pytest.mark.parametrize("table_type", ["flow", "derivative"])
@@ -27,4 +32,93 @@ def test_glottal_forward():
 
     weight = torch.randn(1, seq_length // hop_size, 100).softmax(-1)
     y = glottal(x, weight, hop_size)
-    assert y.shape == (1, seq_length)
\ No newline at end of file
+    assert y.shape == (1, seq_length)
+
+
+def reference_generate(wrapped_phase, tables, hop_length):
+    # direct per-sample lookup: linear along the table, then across frames
+    batch, seq_len = wrapped_phase.shape
+    frames = (seq_len + hop_length - 1) // hop_length
+    if tables.shape[1] < frames + 1:
+        tables = torch.cat(
+            [tables, tables[:, -1:].expand(-1, frames + 1 - tables.shape[1], -1)], 1
+        )
+    table_length = tables.shape[2]
+    padded_tables = torch.cat([tables, tables[:, :, :1]], dim=2)
+
+    t = torch.arange(seq_len)
+    frame, offset = t // hop_length, (t % hop_length) / hop_length
+    raw = wrapped_phase * table_length
+    index = raw.long().clip(0, table_length - 1)
+    p = raw - index
+    b = torch.arange(batch)[:, None]
+
+    def lookup(f):
+        return padded_tables[b, f, index] * (1 - p) + padded_tables[b, f, index + 1] * p
+
+    return lookup(frame) * (1 - offset) + lookup(frame + 1) * offset
+
+
+def reference_forward(
+    glottal, upsampled_phase, table_select_weight, hop_length, offset
+):
+    if isinstance(glottal, IndexedGlottalFlowTable):
+        num_tables = glottal.table.shape[0]
+        raw = table_select_weight * (num_tables - 1)
+        index = raw.long().clip(0, num_tables - 2)
+        p = (raw - index).unsqueeze(-1)
+        tables = glottal.table[index] * (1 - p) + glottal.table[index + 1] * p
+    else:
+        tables = table_select_weight @ glottal.table
+    wrapped_phase = (upsampled_phase.cumsum(1) + offset) % 1
+    return reference_generate(wrapped_phase, tables, hop_length)
+
+
+@pytest.mark.parametrize("seq_length", [4000, 4037])
+@pytest.mark.parametrize("extra_frames", [-3, 0, 2])
+def test_glottal_generate(seq_length, extra_frames):
+    hop_size = 80
+    frames = (seq_length + hop_size - 1) // hop_size + 1 + extra_frames
+    glottal = IndexedGlottalFlowTable()
+    wrapped_phase = torch.rand(2, seq_length)
+    # the clip has to catch a phase that lands on the end of the table
+    wrapped_phase[0, :3] = torch.tensor([0.0, 1.0, 1 - 2**-24])
+    tables = torch.randn(2, frames, 33)
+
+    y = glottal.generate(wrapped_phase, tables, TimeContext(hop_size))
+    expected = reference_generate(wrapped_phase, tables, hop_size)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "table_cls", [IndexedGlottalFlowTable, WeightedGlottalFlowTable]
+)
+@pytest.mark.parametrize("seq_length", [4000, 4037])
+def test_glottal_table_forward(table_cls, seq_length):
+    hop_size = 80
+    frames = seq_length // hop_size + 1
+    glottal = table_cls(trainable=True)
+    upsampled_phase = (torch.rand(2, seq_length) * 0.02).requires_grad_()
+    offset = torch.rand(2, seq_length).requires_grad_()
+    if table_cls is IndexedGlottalFlowTable:
+        weight = torch.rand(2, frames)
+        # weight 1 selects the last table through the clipped floor index
+        weight[:, :2] = torch.tensor([0.0, 1.0])
+    else:
+        weight = torch.rand(2, frames, glottal.table.shape[0]).softmax(-1)
+    weight.requires_grad_()
+    inputs = (upsampled_phase, offset, weight, glottal.table)
+    grad_out = torch.randn(2, seq_length)
+
+    y = glottal(upsampled_phase, weight, TimeContext(hop_size), offset)
+    grads = torch.autograd.grad(y, inputs, grad_out)
+    expected = reference_forward(glottal, upsampled_phase, weight, hop_size, offset)
+    expected_grads = torch.autograd.grad(expected, inputs, grad_out)
+
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-5)
+    for g, expected_g in zip(grads, expected_grads):
+        # the phase gradient is a reversed cumsum, compare relative to its scale
+        scale = expected_g.abs().max().item()
+        assert torch.allclose(g, expected_g, rtol=0, atol=1e-5 * scale)
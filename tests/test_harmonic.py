@@ -0,0 +1,77 @@
+import pytest
+import torch
+
+from models.synth import HarmonicOscillator, SawToothOscillator, AdditivePulseTrain
+from models.utils import TimeContext, linear_upsample
+
+
+def reference_harmonic(
+    upsampled_phase, amplitudes, hop_length, initial_phase, upsampled_phase_offset
+):
+    # per-harmonic phase accumulation, masking each harmonic at its own cutoff
+    harmonic_numbers = torch.arange(1, amplitudes.shape[-1] + 1, dtype=torch.double)
+    harmonics = upsampled_phase.unsqueeze(-1) * harmonic_numbers
+    phase = torch.cumsum(harmonics, dim=1)
+    phase = phase + (upsampled_phase_offset % 1).unsqueeze(-1) * harmonic_numbers
+    phase = phase + initial_phase.unsqueeze(1)
+    if hop_length > 1:
+        amplitudes = linear_upsample(
+            amplitudes.transpose(1, 2), TimeContext(hop_length)
+        ).transpose(1, 2)
+    length = min(amplitudes.shape[1], phase.shape[1])
+    amplitudes = torch.where(harmonics[:, :length] >= 0.5, 0, amplitudes[:, :length])
+    return (torch.sin(phase[:, :length] * 2 * torch.pi) * amplitudes).sum(-1)
+
+
+@pytest.mark.parametrize(
+    "osc_cls", [HarmonicOscillator, SawToothOscillator, AdditivePulseTrain]
+)
+def test_harmonic_oscillator_forward(osc_cls):
+    hop_size = 80
+    seq_length = 4037
+    num_harmonics = 40
+    upsampled_phase = torch.rand(2, seq_length, dtype=torch.double) * 0.04
+    # unvoiced samples carry zero phase increment
+    upsampled_phase[:, 1000:1500] = 0
+    upsampled_phase.requires_grad_()
+    offset = (torch.rand(2, seq_length, dtype=torch.double) * 3).requires_grad_()
+    initial_phase = torch.rand(2, num_harmonics, dtype=torch.double).requires_grad_()
+    inputs = [upsampled_phase, offset, initial_phase]
+    grad_out = torch.randn(2, seq_length, dtype=torch.double)
+
+    if osc_cls is HarmonicOscillator:
+        osc = osc_cls()
+        amplitudes = torch.rand(
+            2,
+            (seq_length + hop_size - 1) // hop_size + 1,
+            num_harmonics,
+            dtype=torch.double,
+        ).requires_grad_()
+        inputs.append(amplitudes)
+        y = osc(
+            upsampled_phase, amplitudes, TimeContext(hop_size), initial_phase, offset
+        )
+        expected = reference_harmonic(
+            upsampled_phase, amplitudes, hop_size, initial_phase, offset
+        )
+    else:
+        osc = osc_cls(num_harmonics).double()
+        y = osc(upsampled_phase, initial_phase, offset)
+        if osc_cls is SawToothOscillator:
+            amplitudes = osc.amplicudes.expand(2, seq_length, -1)
+        else:
+            amplitudes = (0.5 / upsampled_phase).rsqrt().unsqueeze(-1)
+            amplitudes = amplitudes.expand(-1, -1, num_harmonics)
+        expected = reference_harmonic(
+            upsampled_phase, amplitudes, 1, initial_phase, offset
+        )
+
+    grads = torch.autograd.grad(y, inputs, grad_out)
+    expected_grads = torch.autograd.grad(expected, inputs, grad_out)
+
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-8)
+    for g, expected_g in zip(grads, expected_grads):
+        # zero phase makes the pulse train amplitude gradient nan in both
+        scale = expected_g.nan_to_num().abs().max().item()
+        assert torch.allclose(g, expected_g, rtol=0, atol=1e-6 * scale, equal_nan=True)
@@ -0,0 +1,111 @@
+import pytest
+import torch
+
+from models.filters import (
+    LTVFilterInterface,
+    LTVMinimumPhaseFIRFilter,
+    LTVZeroPhaseFIRFilter,
+)
+from models.hpn import HarmonicPlusNoiseSynth
+from models.noise import StandardNormalNoise
+from models.synth import (
+    HarmonicOscillator,
+    DownsampledIndexedGlottalFlowTable,
+    DownsampledWeightedGlottalFlowTable,
+)
+from models.utils import TimeContext
+
+
+def test_forward_chunked():
+    hop_size = 80
+    frames = 500
+    ctx = TimeContext(hop_size)
+    phase = torch.linspace(100, 300, frames).repeat(2, 1) / 24000
+    amplitudes = torch.rand(2, frames, 20) * 0.1
+    silent = torch.full((2, frames, 65), -40.0)
+    synth = HarmonicPlusNoiseSynth(
+        HarmonicOscillator(),
+        StandardNormalNoise(),
+        noise_filter=LTVZeroPhaseFIRFilter("hanning"),
+    )
+    args = (ctx, (phase,), (amplitudes,), (), (silent,))
+
+    expected = synth(*args)
+    y = synth.forward_chunked(*args, chunk_frames=120, overlap_frames=8)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=5e-3)
+
+
+@pytest.mark.parametrize(
+    "filter_cls", [LTVZeroPhaseFIRFilter, LTVMinimumPhaseFIRFilter]
+)
+def test_forward_chunked_harm_filter(filter_cls):
+    hop_size = 80
+    frames = 500
+    ctx = TimeContext(hop_size)
+    # float64 keeps the phase exact, so chunking is the only difference
+    phase = torch.linspace(100, 300, frames, dtype=torch.float64).repeat(2, 1) / 24000
+    amplitudes = torch.rand(2, frames, 20, dtype=torch.float64) * 0.1
+    # kernels longer than a hop, so the filters read across several frames
+    log_mag = torch.randn(2, frames, 257, dtype=torch.float64).cumsum(1) * 0.1
+    silent = torch.full((2, frames, 65), -40.0, dtype=torch.float64)
+    synth = HarmonicPlusNoiseSynth(
+        HarmonicOscillator(),
+        StandardNormalNoise(),
+        harm_filter=filter_cls("hanning"),
+        noise_filter=LTVZeroPhaseFIRFilter("hanning"),
+    ).double()
+    args = (ctx, (phase,), (amplitudes,), (log_mag,), (silent,))
+
+    expected = synth(*args)
+    y = synth.forward_chunked(*args, chunk_frames=120, overlap_frames=8)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-8)
+
+
+class IdentityFilter(LTVFilterInterface):
+    def forward(self, ex, *args, ctx, **kwargs):
+        return ex
+
+
+def test_forward_chunked_unknown_support():
+    frames = 500
+    ctx = TimeContext(80)
+    phase = torch.linspace(100, 300, frames).repeat(2, 1) / 24000
+    amplitudes = torch.rand(2, frames, 20) * 0.1
+    synth = HarmonicPlusNoiseSynth(
+        HarmonicOscillator(), StandardNormalNoise(), harm_filter=IdentityFilter()
+    )
+    args = (ctx, (phase,), (amplitudes,), (), ())
+
+    with pytest.raises(ValueError):
+        synth.forward_chunked(*args, chunk_frames=120, overlap_frames=8)
+    y = synth.forward_chunked(
+        *args, chunk_frames=120, overlap_frames=8, context_frames=0
+    )
+    assert y.shape == synth(*args).shape
+
+
+@pytest.mark.parametrize(
+    "osc_cls", [DownsampledIndexedGlottalFlowTable, DownsampledWeightedGlottalFlowTable]
+)
+@pytest.mark.parametrize("overlap_frames", [8, 16])
+def test_forward_chunked_downsampled(osc_cls, overlap_frames):
+    hop_size = 80
+    frames = 400
+    ctx = TimeContext(hop_size)
+    # float64 keeps the phase exact, so chunking is the only difference
+    phase = torch.linspace(100, 300, frames, dtype=torch.float64).repeat(2, 1) / 24000
+    h = torch.randn(2, frames, 8, dtype=torch.float64).cumsum(1) * 0.1
+    silent = torch.full((2, frames, 65), -40.0, dtype=torch.float64)
+    synth = HarmonicPlusNoiseSynth(
+        osc_cls(10, 8),
+        StandardNormalNoise(),
+        noise_filter=LTVZeroPhaseFIRFilter("hanning"),
+    ).double()
+    args = (ctx, (phase,), (h,), (), (silent,))
+
+    expected = synth(*args)
+    y = synth.forward_chunked(*args, chunk_frames=120, overlap_frames=overlap_frames)
+    assert y.shape == expected.shape
+    assert torch.allclose(y, expected, atol=1e-6)